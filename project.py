@@ -1,8 +1,13 @@
 import random
 import os
 import sys
-from typing import List, Tuple
+import threading
+import time
+import itertools
+import math
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 from collections import Counter
+from operator import eq
 
 
 class GameResponse:
@@ -44,8 +49,10 @@ class Mastermind:
         9: (DR, 7, 9, True),
     }
     MAX_LEVEL = 9
+    MAX_EVIL_LEVEL = 7  # Largest level the evil codemaker can answer quickly
     OTHER_LEVELS = {
         "c": 0,  # Custom level
+        "e": 98,  # Evil codemaker level
         "p": 99,  # Progressive level
     }
 
@@ -80,6 +87,219 @@ class ColoredText:
         print(f"{color_code}{text}{cls.colors['reset']}", end="")
 
 
+class Speculator:
+    """
+    Precomputes solver data in a background thread while the player is thinking about their next guess.
+    Finds the codes that still fit the results and scores possible guesses by their largest group of answers.
+    """
+    TIME_BUDGET = 5.0  # Seconds of background work allowed after each guess
+    MAX_CODES = 50_000  # Most codes kept in memory, including the groups kept for the best guesses
+    LOOKAHEAD = 3  # Most best guesses whose groups are kept to speed up the next turn
+    CHECK_EVERY = 1024  # How many codes are checked between looking for a cancel or the time budget
+    JOIN_TIMEOUT = 0.5  # Seconds to wait for cancelled work to stop
+    MAX_SPACE = 100_000  # Largest number of codes that can be checked within the time budget
+
+    def __init__(self, conditions: Tuple[int, int, int, bool]):
+        _, length, limit, duplicates = conditions
+        self.conditions = conditions
+        # Larger games can't be searched within the budget, so no work is started for them
+        self.available = (limit ** length if duplicates else math.perm(limit, length)) <= self.MAX_SPACE
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+        self._thread = None
+        self._target = ()  # The history the player is currently looking at
+        self._history = None  # The history the results below belong to
+        self._candidates = None
+        self._scores = {}
+        self._groups = {}
+
+    def start(self, data: List[Tuple[str, int, int]], candidates: Optional[List[Tuple[int, ...]]] = None) -> None:
+        """
+        Cancels any stale work and starts precomputing for the current history.
+
+        :param data: The previous guesses and their results.
+        :param candidates: The codes that still fit the results if they are already known, such as in evil mode.
+        :returns: None
+        """
+        self.cancel()
+        history = tuple(data)
+        with self._lock:
+            self._target = history
+            self._cancel = threading.Event()
+            cancel = self._cancel
+        if candidates is None and not self.available:
+            return
+        self._thread = threading.Thread(target=self._run, args=(history, cancel, candidates), daemon=True)
+        self._thread.start()
+
+    def cancel(self) -> None:
+        """
+        Stops the background work, anything it has not finished is thrown away.
+
+        :returns: None
+        """
+        with self._lock:
+            self._cancel.set()
+        if self._thread:
+            self._thread.join(self.JOIN_TIMEOUT)
+        self._thread = None
+
+    def candidates(self) -> Optional[List[Tuple[int, ...]]]:
+        """
+        Gets the codes that still fit the results the player is looking at.
+
+        :returns: The codes that still fit the current results, or None if they are not ready.
+        """
+        with self._lock:
+            if self._history != self._target:
+                return None
+            return self._candidates
+
+    def is_consistent(self, guess: str) -> Optional[bool]:
+        """
+        Checks if a guess fits every result so far.
+
+        :param guess: The guess to check.
+        :returns: If the guess could still be the code, or None if the possible codes are not ready.
+        """
+        candidates = self.candidates()
+        if candidates is None:
+            return None
+        return tuple(int(n) for n in guess) in candidates
+
+    def best_guess(self) -> Optional[Tuple[int, ...]]:
+        """
+        Gets the guess that leaves the fewest codes possible in the worst case.
+
+        :returns: The scored guess with the smallest largest group, or None if no guesses were scored.
+        """
+        with self._lock:
+            if self._history != self._target or not self._scores:
+                return None
+            return min(self._scores, key=self._scores.get)
+
+    def _run(self, history: Tuple[Tuple[str, int, int], ...], cancel: threading.Event,
+             candidates: Optional[List[Tuple[int, ...]]] = None) -> None:
+        """
+        Does the background work for one turn. Finds the possible codes and publishes them straight away,
+        then scores each possible code as a guess by its largest group of results until the time budget runs out.
+        The groups of the best LOOKAHEAD guesses are kept so the next turn can skip the search, but only as many
+        as fit in MAX_CODES.
+
+        :param history: The previous guesses and their results.
+        :param cancel: Set when the real guess arrives and this work is stale.
+        :param candidates: The codes that still fit the results if they are already known.
+        :returns: None
+        """
+        deadline = time.monotonic() + self.TIME_BUDGET
+
+        def out_of_budget() -> bool:
+            return cancel.is_set() or time.monotonic() > deadline
+
+        if candidates is None:
+            candidates = self._find_candidates(history, out_of_budget)
+        if candidates is None or not self._publish(cancel, history, candidates, {}, {}):
+            return
+
+        # Each kept guess holds every possible code again in its groups, so fewer are kept for large sets
+        lookahead = max(min(self.LOOKAHEAD, self.MAX_CODES // max(len(candidates), 1) - 1), 0)
+        scores, best = {}, []
+        for guess in candidates:
+            if out_of_budget():
+                break
+            groups = partition(candidates, guess)
+            scores[guess] = max(len(group) for group in groups.values())
+            # Keeps the groups of the best guesses, if the player picks one the next candidates are already known
+            best.append((scores[guess], guess, groups))
+            best.sort(key=lambda item: item[0])
+            del best[lookahead:]
+
+        self._publish(cancel, history, candidates, scores, {guess: groups for _, guess, groups in best})
+
+    def _find_candidates(self, history: Tuple[Tuple[str, int, int], ...],
+                         out_of_budget: Callable[[], bool]) -> Optional[List[Tuple[int, ...]]]:
+        """
+        Finds the codes that fit every result, reusing the last turn's results when only one guess was added.
+
+        :param history: The previous guesses and their results.
+        :param out_of_budget: Returns True when the work has been cancelled or run out of time.
+        :returns: The codes that fit every result, or None if the budget ran out first.
+        """
+        with self._lock:
+            previous, candidates, groups = self._history, self._candidates, self._groups
+
+        # Starts from the last results when only one guess was added to save checking every code again
+        if history and previous == history[:-1] and candidates is not None:
+            guess, exact, misplaced = history[-1]
+            guess = tuple(int(n) for n in guess)
+            if guess in groups:
+                return groups[guess].get((exact, misplaced), [])
+            source, checks = candidates, history[-1:]
+        else:
+            source, checks = code_space(self.conditions), history
+
+        checks = [(tuple(int(n) for n in guess), (exact, misplaced)) for guess, exact, misplaced in checks]
+        found = []
+        for count, code in enumerate(source):
+            if count % self.CHECK_EVERY == 0 and out_of_budget():
+                return None
+            if all(check(code, guess) == result for guess, result in checks):
+                found.append(code)
+                if len(found) > self.MAX_CODES:
+                    return None
+        return found
+
+    def _publish(self, cancel: threading.Event, history: Tuple[Tuple[str, int, int], ...],
+                 candidates: List[Tuple[int, ...]], scores: Dict[Tuple[int, ...], int],
+                 groups: Dict[Tuple[int, ...], Dict[Tuple[int, int], List[Tuple[int, ...]]]]) -> bool:
+        """
+        Saves the results for the history unless the work was cancelled.
+
+        :param cancel: Set when this work is stale.
+        :param history: The previous guesses and their results.
+        :param candidates: The codes that fit every result.
+        :param scores: The largest group of results for each scored guess.
+        :param groups: The groups of results for the best guesses.
+        :returns: True if the results were saved.
+        """
+        with self._lock:
+            if cancel.is_set():
+                return False
+            self._history, self._candidates, self._scores, self._groups = history, candidates, scores, groups
+            return True
+
+
+class EvilCodemaker:
+    """
+    Answers guesses without picking a code up front. After each guess it keeps the largest group of codes
+    that give the same result, so the code is only pinned down when the player forces it.
+    """
+
+    def __init__(self, conditions: Tuple[int, int, int, bool]):
+        self.candidates = list(code_space(conditions))
+
+    def respond(self, guess: List[int]) -> Tuple[int, int]:
+        """
+        Picks the result that leaves the most codes possible.
+
+        :param guess: The guessed code.
+        :returns: A tuple with counts of exact matches and misplaced matches.
+        """
+        groups = partition(self.candidates, tuple(guess))
+        # Ties go to the result with fewer exact matches, so a lone correct guess is only accepted when it has to be
+        result = max(groups, key=lambda r: (len(groups[r]), -r[0]))
+        self.candidates = groups[result]
+        return result
+
+    def code(self) -> Tuple[int, ...]:
+        """
+        Picks a code to reveal at the end of the game.
+
+        :returns: One of the codes that still fits every result given.
+        """
+        return random.choice(self.candidates)
+
+
 def main() -> None:
     """
     Run the main game loop.
@@ -107,6 +327,8 @@ def main() -> None:
 
             if level == Mastermind.OTHER_LEVELS["p"]:
                 code, won, prog_round = progressive_game()
+            elif level == Mastermind.OTHER_LEVELS["e"]:
+                code, won = evil_game()
             else:
                 code, won = regular_game(level)
 
@@ -208,7 +430,7 @@ def get_level() -> int:
                 case _:
                     raise ValueError
         except ValueError:
-            print(f"\n Please enter a number between {Mastermind.MIN_LEVEL}-{Mastermind.MAX_LEVEL}, 'C' for custom, 'P' for progressive, '?' for help or 'end' to exit")
+            print(f"\n Please enter a number between {Mastermind.MIN_LEVEL}-{Mastermind.MAX_LEVEL}, 'C' for custom, 'E' for evil, 'P' for progressive, '?' for help or 'end' to exit")
         except KeyboardInterrupt:
             print(" Input was cancelled.")
         except EOFError:
@@ -223,10 +445,11 @@ def print_menu():
             ├─────┼────────────────────────────┤
             │ \033[36m{Mastermind.MIN_LEVEL}-{Mastermind.MAX_LEVEL}\033[0m │ \033[36mStart a game at that level\033[0m │
             │  \033[33mC\033[0m  │ \033[33mStart a custom game\033[0m        │
-            │  \033[36mP\033[0m  │ \033[36mStart a progressive game\033[0m   │
-            │  \033[33mL\033[0m  │ \033[33mShow Level Information\033[0m     │
-            │  \033[36m?\033[0m  │ \033[36mHow to play\033[0m                │
-            │ \033[33mend\033[0m │ \033[33mEnd program\033[0m                │
+            │  \033[36mE\033[0m  │ \033[36mStart an evil game\033[0m         │
+            │  \033[33mP\033[0m  │ \033[33mStart a progressive game\033[0m   │
+            │  \033[36mL\033[0m  │ \033[36mShow Level Information\033[0m     │
+            │  \033[33m?\033[0m  │ \033[33mHow to play\033[0m                │
+            │ \033[36mend\033[0m │ \033[36mEnd program\033[0m                │
             └─────┴────────────────────────────┘""")
 
 def print_levels() -> None:
@@ -250,7 +473,9 @@ def print_levels() -> None:
     for level, details in Mastermind.LEVELS.items():
         _, length, limit, duplicates = details
         print(f"   {level}) {length} digits of 1-{limit}, {'no duplicates' if not duplicates else 'duplicates allowed'}")
-    print("""   C) You choose the length, numbers, rounds, and decide if duplicates are allowed
+    print(f"""   C) You choose the length, numbers, rounds, and decide if duplicates are allowed
+   E) You pick a level {Mastermind.MIN_LEVEL}-{Mastermind.MAX_EVIL_LEVEL} but the code isn't chosen until the end. After each guess the evil codemaker
+      gives the result that leaves the most codes possible, so you have to force it into a corner.
    P) You start on level 4 but with only 8 guesses and after solving a code you play again. The difficulty
       increases after each win. You play until you fail to guess a code. How long can you last?\x1B[0m""")
     print_menu()
@@ -416,20 +641,46 @@ def regular_game(level: int) -> Tuple[Tuple[int, ...], bool]:
     return code, won
 
 
-def both_games(conditions: Tuple[int, int, int, bool]) -> Tuple[Tuple[int, ...], bool]:
+def evil_game() -> Tuple[Tuple[int, ...], bool]:
+    """
+    Handles the logic for the evil game mode, where the code isn't chosen until the player forces it.
+
+    :returns: A code that fits every result and a boolean indicating if the game was won.
+    """
+    level = 0
+    while level == 0:
+        try:
+            l = input(f" Which level should the evil codemaker play({Mastermind.MIN_LEVEL}-{Mastermind.MAX_EVIL_LEVEL}): ").strip()
+            if l.isdigit() and Mastermind.MIN_LEVEL <= int(l) <= Mastermind.MAX_EVIL_LEVEL:
+                level = int(l)
+            else:
+                raise ValueError(f" Please enter a number between {Mastermind.MIN_LEVEL}-{Mastermind.MAX_EVIL_LEVEL}.")
+        except ValueError as e:
+            print(e)
+
+    return both_games(Mastermind.LEVELS[level], evil=True)
+
+
+def both_games(conditions: Tuple[int, int, int, bool], evil: bool = False) -> Tuple[Tuple[int, ...], bool]:
     """
-    Manages the game elements common for both regular and progressive modes.
+    Manages the game elements common for the regular, progressive and evil modes.
 
     :param conditions: The game settings (guesses, length, limit, duplicates).
+    :param evil: If True, no code is generated and the evil codemaker answers the guesses.
     :returns: The secret code and a boolean indicating if the game was won.
     """
     guesses, length, limit, duplicates = conditions
 
-    code = gen_code(conditions)
+    codemaker = EvilCodemaker(conditions) if evil else None
+    code = None if evil else gen_code(conditions)
 
-    print(f"\n You have {guesses} attempts to guess a {length}-digit code composed of numbers 1-{limit}, {'with repeated numbers allowed.' if duplicates else 'with no repeated numbers.'} \n")
+    print(f"\n You have {guesses} attempts to guess a {length}-digit code composed of numbers 1-{limit}, {'with repeated numbers allowed.' if duplicates else 'with no repeated numbers.'}")
+    print(" Enter 'h' after a guess for a hint.\n")
 
-    won, tries = gameplay(conditions, code)
+    won, tries = gameplay(conditions, code, codemaker)
+
+    if codemaker:
+        code = codemaker.code()
 
     if won:
         print(f" You guessed the code in {tries} tries.")
@@ -460,35 +711,49 @@ def gen_code(conditions: Tuple[int, int, int, bool]) -> Tuple[int, ...]:
         return tuple(random.sample(range(1, limit + 1), length))
 
 
-def gameplay(conditions: Tuple[int, int, int, bool], code: Tuple[int, ...]) -> Tuple[bool, int]:
+def gameplay(conditions: Tuple[int, int, int, bool], code: Optional[Tuple[int, ...]],
+             codemaker: Optional[EvilCodemaker] = None) -> Tuple[bool, int]:
     """
     Main loop for the game, prompts the user for guesses, checks guess against the secret code and displays the results.
 
     :param conditions: The game conditions (guesses, length, limit, duplicates).
-    :param code: The secret code to be guessed.
+    :param code: The secret code to be guessed, None when the evil codemaker answers instead.
+    :param codemaker: The evil codemaker that answers the guesses, if any.
     :returns: A boolean indicating if the game was won and the number of tries taken.
     """
-    remaining_guesses, _, limit, _ = conditions
+    remaining_guesses, length, limit, _ = conditions
     data: list = []
+    possible: list = []  # How many codes could still be the code before each guess
+    speculator = Speculator(conditions)
 
     while remaining_guesses > 0:
         remaining_guesses -= 1
 
-        guess = get_guess(data, limit, len(code), remaining_guesses)
+        guess = get_guess(data, limit, length, remaining_guesses, speculator)
+        candidates = speculator.candidates()
+        possible.append(None if candidates is None else len(candidates))
+        # The real guess has arrived so any work for the previous turn is stale
+        speculator.cancel()
         guessed = [int(n) for n in str(guess)]
 
-        exact, misplaced = check(code, guessed)
+        exact, misplaced = codemaker.respond(guessed) if codemaker else check(code, guessed)
 
         data.append((guess, exact, misplaced))
         display_table(data, remaining_guesses, limit)
 
-        if exact == len(code):
+        if exact == length:
             display_table(data, remaining_guesses, limit, hide=True)
+            print_analysis(possible)
             return True, (conditions[0] - remaining_guesses)
+        # Works out the possible codes and best guesses while the player thinks
+        speculator.start(data, codemaker.candidates if codemaker else None)
+    speculator.cancel()
+    print_analysis(possible)
     return False, 0
 
 
-def get_guess(data: list[Tuple[int, ...]], limit: int, code_length: int, remaining_guesses: int) -> str:
+def get_guess(data: list[Tuple[int, ...]], limit: int, code_length: int, remaining_guesses: int,
+              speculator: Optional[Speculator] = None) -> str:
     """
     Prompts the user for a guess and validates the input.
 
@@ -496,6 +761,7 @@ def get_guess(data: list[Tuple[int, ...]], limit: int, code_length: int, remaini
     :param limit: The maximum digit value allowed in the guess.
     :param code_length: The required length of the guess.
     :param remaining_guesses: The number of guesses remaining.
+    :param speculator: The background solver used for hints.
     :returns: A valid guess input by the user.
     """
     while True:
@@ -505,6 +771,9 @@ def get_guess(data: list[Tuple[int, ...]], limit: int, code_length: int, remaini
                 Mastermind.flip_symbolic()
                 display_table(data, (remaining_guesses + 1), limit)
                 continue
+            if guess.lower() == "h":
+                print_hint(data, speculator)
+                continue
             if not guess:
                 print(" Invalid guess! Must enter numbers.")
                 continue
@@ -520,6 +789,10 @@ def get_guess(data: list[Tuple[int, ...]], limit: int, code_length: int, remaini
             if len(guess) != code_length:
                 print(f" Invalid guess! Please enter exactly {code_length} digits")
                 continue
+            if speculator and data and speculator.is_consistent(guess) is False:
+                confirm = input(" That guess can't be the code, it doesn't fit your results. Use it anyway? (y/n): ")
+                if confirm.strip().lower() not in GameResponse.YES:
+                    continue
             return guess
         except KeyboardInterrupt:
             print(" Input was cancelled.")
@@ -530,6 +803,42 @@ def get_guess(data: list[Tuple[int, ...]], limit: int, code_length: int, remaini
             print(" Invalid guess!")
 
 
+def print_hint(data: list[Tuple[int, ...]], speculator: Optional[Speculator]) -> None:
+    """
+    Displays how many codes still fit the results and a suggested guess from the background solver.
+
+    :param data: The previous guesses and their results.
+    :param speculator: The background solver used for hints.
+    :returns: None
+    """
+    if speculator and not speculator.available:
+        print(" Hints aren't available for codes this large.")
+        return
+
+    candidates = speculator.candidates() if speculator and data else None
+    if candidates is None:
+        print(" No hint yet, make a guess or try again in a moment.")
+        return
+
+    print(f" {len(candidates)} possible {'code fits' if len(candidates) == 1 else 'codes fit'} your results.", end="")
+    best = speculator.best_guess()
+    print(f" Try {''.join(map(str, best))}" if best else "")
+
+
+def print_analysis(possible: List[Optional[int]]) -> None:
+    """
+    Displays how many codes could still have been the code before each guess after the first.
+
+    :param possible: The number of possible codes before each guess, None where it wasn't worked out.
+    :returns: None
+    """
+    if not any(count is not None for count in possible[1:]):
+        return
+
+    counts = ", ".join(f"guess {turn}: {'?' if count is None else count}" for turn, count in enumerate(possible[1:], 2))
+    print(f" Codes that still fit before each guess, {counts}")
+
+
 def check(code: Tuple[int, ...], guess: List[int]) -> Tuple[int, int]:
     """
     Checks the guessed code against the secret code and returns the results.
@@ -545,6 +854,49 @@ def check(code: Tuple[int, ...], guess: List[int]) -> Tuple[int, int]:
     return exact, misplaced
 
 
+def code_space(conditions: Tuple[int, int, int, bool]) -> Iterator[Tuple[int, ...]]:
+    """
+    Yields every code that gen_code could generate for the game conditions.
+
+    :param conditions: The game settings (guesses, length, limit, duplicates).
+    :returns: An iterator over the possible codes.
+    """
+    _, length, limit, duplicates = conditions
+    numbers = range(1, limit + 1)
+
+    if not duplicates:
+        yield from itertools.permutations(numbers, length)
+        return
+
+    # gen_code never repeats a number more than half the length of the code
+    half = max(length // 2, Mastermind.MIN_REPEATED)
+    for code in itertools.product(numbers, repeat=length):
+        if max(Counter(code).values()) <= half:
+            yield code
+
+
+def partition(candidates: List[Tuple[int, ...]], guess: Tuple[int, ...]) -> Dict[Tuple[int, int], List[Tuple[int, ...]]]:
+    """
+    Groups the possible codes by the result the guess would get if that code was the secret code.
+
+    :param candidates: The codes that could still be the secret code.
+    :param guess: The guessed code.
+    :returns: A dictionary of each result (exact, misplaced) and the codes that would give it.
+    """
+    guess_counts = Counter(guess)
+    totals: dict = {}
+    groups: dict = {}
+    for code in candidates:
+        # Codes with the same numbers in any order share the same total matches, so each total is only counted once
+        numbers = tuple(sorted(code))
+        total = totals.get(numbers)
+        if total is None:
+            total = totals[numbers] = sum((Counter(numbers) & guess_counts).values())
+        exact = sum(map(eq, code, guess))
+        groups.setdefault((exact, total - exact), []).append(code)
+    return groups
+
+
 def display_table(data: List[Tuple[int, ...]], remaining_guesses: int, limit: int, hide: bool = False) -> None:
     """
      Clears the console screen and displays a table of guesses and results.
@@ -1,5 +1,7 @@
-from project import get_level, custom_level, gen_code, check, prog_game_won
+from project import get_level, custom_level, evil_game, gen_code, check, prog_game_won, code_space, partition, EvilCodemaker, \
+    Speculator, get_guess, print_hint, print_analysis
 import itertools
+import time
 
 
 def test_get_level(monkeypatch):
@@ -18,6 +20,15 @@ def test_get_level(monkeypatch):
     assert result == 3
 
 
+def test_get_level_evil(monkeypatch):
+    monkeypatch.setattr("builtins.input", lambda x: "e")
+    assert get_level() == 98
+
+    inputs = iter(["x", "E"])
+    monkeypatch.setattr('builtins.input', lambda _: next(inputs))
+    assert get_level() == 98
+
+
 def test_custom_level(monkeypatch):
     inputs = iter(["3", "y", "4", "5",])
     monkeypatch.setattr('builtins.input', lambda _: next(inputs))
@@ -40,6 +51,17 @@ def test_custom_level(monkeypatch):
     assert result == (5, 3, 4, False)
 
 
+def test_evil_game(monkeypatch):
+    monkeypatch.setattr("project.both_games", lambda conditions, evil: (conditions, evil))
+
+    monkeypatch.setattr("builtins.input", lambda _: "7")
+    assert evil_game() == ((12, 5, 8, True), True)
+
+    inputs = iter(["8", "9", "0", "x", "", "3"])
+    monkeypatch.setattr("builtins.input", lambda _: next(inputs))
+    assert evil_game() == ((12, 4, 6, False), True)
+
+
 def test_gen_code():
     conditions = (12, 3, 1, True)
     assert gen_code(conditions) == (1, 1, 1)
@@ -64,6 +86,154 @@ def test_check():
     assert check([1, 2, 2, 2], [0, 1, 1, 1]) == (0, 1)
 
 
+def test_code_space():
+    assert len(list(code_space((12, 3, 5, False)))) == 60
+    assert (1, 1, 2) in code_space((12, 3, 5, True))
+    assert (1, 1, 1) not in code_space((12, 3, 5, True))
+    assert (1, 1, 1, 2, 2, 3) in code_space((12, 6, 5, True))
+    assert (1, 1, 1, 1, 2, 3) not in code_space((12, 6, 5, True))
+
+
+def test_partition():
+    candidates = [(1, 2, 3), (3, 2, 1), (4, 5, 6), (1, 2, 4)]
+    groups = partition(candidates, (1, 2, 3))
+    assert groups == {(3, 0): [(1, 2, 3)], (1, 2): [(3, 2, 1)], (0, 0): [(4, 5, 6)], (2, 0): [(1, 2, 4)]}
+    assert sum(len(group) for group in partition(candidates, (4, 4, 4)).values()) == 4
+
+    space = list(code_space((12, 4, 6, True)))
+    for guess in [(1, 1, 2, 2), (1, 2, 3, 4), (6, 6, 5, 1)]:
+        for result, group in partition(space, guess).items():
+            assert all(check(code, list(guess)) == result for code in group)
+
+
+def test_evil_codemaker():
+    conditions = (12, 3, 5, False)
+    codemaker = EvilCodemaker(conditions)
+    exact, misplaced = codemaker.respond([1, 2, 3])
+    assert exact == 0
+    assert all(check(code, [1, 2, 3]) == (exact, misplaced) for code in codemaker.candidates)
+
+    codemaker.candidates = [(1, 2, 3), (1, 2, 4)]
+    assert codemaker.respond([1, 2, 3]) == (2, 0)
+    assert codemaker.code() == (1, 2, 4)
+    assert codemaker.respond([1, 2, 4]) == (3, 0)
+
+
+def test_speculator_given_candidates():
+    codemaker = EvilCodemaker((12, 3, 5, False))
+    codemaker.respond([1, 2, 3])
+    speculator = Speculator((12, 3, 5, False))
+    speculator.start([("123", 0, 2)], codemaker.candidates)
+    assert wait_for_candidates(speculator) is codemaker.candidates
+    speculator.cancel()
+
+
+def wait_for_candidates(speculator):
+    deadline = time.monotonic() + 5
+    while speculator.candidates() is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return speculator.candidates()
+
+
+def test_speculator_candidates():
+    conditions = (12, 3, 5, False)
+    data = [("123", 1, 1)]
+    speculator = Speculator(conditions)
+    speculator.start(data)
+    expected = [code for code in code_space(conditions) if check(code, [1, 2, 3]) == (1, 1)]
+    assert wait_for_candidates(speculator) == expected
+
+    deadline = time.monotonic() + 5
+    while speculator.best_guess() is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert speculator.best_guess() in expected
+    speculator.cancel()
+
+
+def test_speculator_stale(monkeypatch):
+    speculator = Speculator((12, 3, 5, False))
+    speculator.start([("123", 1, 1)])
+    assert wait_for_candidates(speculator) is not None
+
+    # The new run does nothing, so the old results must not be shown for the new history
+    monkeypatch.setattr(speculator, "_run", lambda *args: None)
+    speculator.start([("123", 1, 1), ("145", 0, 1)])
+    assert speculator.candidates() is None
+    assert speculator.best_guess() is None
+    speculator.cancel()
+
+
+def test_speculator_cancel():
+    speculator = Speculator((12, 5, 8, True))
+    speculator.start([("12345", 1, 1)])
+    speculator.cancel()
+    time.sleep(0.5)
+    assert speculator.candidates() is None
+    assert speculator.best_guess() is None
+
+
+def test_speculator_reuse(monkeypatch):
+    conditions = (12, 3, 5, False)
+    scans = []
+
+    def spy(conditions):
+        scans.append(conditions)
+        return code_space(conditions)
+
+    monkeypatch.setattr("project.code_space", spy)
+    data = [("123", 1, 1)]
+    speculator = Speculator(conditions)
+    speculator.start(data)
+    deadline = time.monotonic() + 5
+    while speculator.best_guess() is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    guess = speculator.best_guess()
+    data.append(("".join(map(str, guess)), *check((4, 2, 1), list(guess))))
+    speculator.start(data)
+    expected = [code for code in code_space(conditions) if all(check(code, [int(n) for n in g]) == (e, m) for g, e, m in data)]
+    assert wait_for_candidates(speculator) == expected
+    assert len(scans) == 1
+    speculator.cancel()
+
+
+def test_speculator_unavailable(capsys):
+    speculator = Speculator((12, 6, 8, True))
+    assert not speculator.available
+    speculator.start([("123456", 1, 1)])
+    assert speculator.candidates() is None
+    print_hint([("123456", 1, 1)], speculator)
+    assert "aren't available" in capsys.readouterr().out
+    assert Speculator((12, 5, 8, True)).available
+
+
+def test_get_guess_warning(monkeypatch):
+    data = [("123", 1, 1)]
+    speculator = Speculator((12, 3, 5, False))
+    speculator.start(data)
+    wait_for_candidates(speculator)
+
+    prompts = []
+    inputs = iter(["123", "n", "134"])
+    monkeypatch.setattr("builtins.input", lambda prompt: prompts.append(prompt) or next(inputs))
+    assert get_guess(data, 5, 3, 10, speculator) == "134"
+    assert "can't be the code" in prompts[1]
+    assert len(prompts) == 3
+
+    prompts.clear()
+    inputs = iter(["123", "y"])
+    assert get_guess(data, 5, 3, 10, speculator) == "123"
+    assert "can't be the code" in prompts[1]
+    speculator.cancel()
+
+
+def test_print_analysis(capsys):
+    print_analysis([None, 300, None, 5])
+    assert capsys.readouterr().out == " Codes that still fit before each guess, guess 2: 300, guess 3: ?, guess 4: 5\n"
+    print_analysis([None, None])
+    assert capsys.readouterr().out == ""
+
+
 def test_prog_game_won1():
     conditions = (8, 8, 9, True)
     assert prog_game_won(conditions, 1) == (10, 9, 9, True)